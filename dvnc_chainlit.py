@@ -6,234 +6,427 @@ Leonardo da Vinci-inspired AI System with Enhanced UI/UX
 
 import chainlit as cl
 import random
+import re
 import asyncio
 import json
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
 from datetime import datetime
 from pathlib import Path
+from types import MappingProxyType
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# ---------- Keyword Matching ----------
+
+# (domain, ((concept, tokens), ...)) per model; hashable so it can key the caches below
+ConceptTable = Tuple[Tuple[str, Tuple[Tuple[str, Tuple[str, ...]], ...]], ...]
+
+# Long prompts are scanned in windows that start at this many characters and double
+# each time, so matching can stop once every concept has been seen
+_SCAN_WINDOW = 512
+
+@lru_cache(maxsize=16)
+def _build_keyword_matcher(concept_table: ConceptTable):
+    """Returns a function giving the distinct (domain index, concept bit) targets of the tokens
+    starting in text[start:end].
+
+    Concept bits follow each domain's position in concept_table, so a domain's hits fit in one int.
+    Repeated tokens are collapsed while scanning, so callers only loop over distinct hits.
+    """
+    token_targets = defaultdict(list)
+    for d, (_, concepts) in enumerate(concept_table):
+        for j, (_, tokens) in enumerate(concepts):
+            for token in tokens:
+                token_targets[token].append((d, 1 << j))
+    token_targets = {token: tuple(targets) for token, targets in token_targets.items()}
+    # Windows overlap by the longest token, so a token crossing a boundary is still found
+    overlap = max(map(len, token_targets)) - 1
+
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for token, targets in token_targets.items():
+            automaton.add_word(token, targets)
+        automaton.make_automaton()
+        return lambda text, start, end: set(map(itemgetter(1), automaton.iter(text[start:end + overlap])))
+
+    # Fallback: a single alternation tried at every offset so overlapping tokens
+    # are still found. The longest token wins at each offset, so every token also
+    # carries the targets of the shorter tokens it starts with.
+    closure = {
+        token: tuple(t for other, targets in token_targets.items() if token.startswith(other) for t in targets)
+        for token in token_targets
+    }
+    alternation = "|".join(map(re.escape, sorted(token_targets, key=len, reverse=True)))
+    pattern = re.compile(f"(?=({alternation}))")
+    return lambda text, start, end: {closure[token] for token in set(pattern.findall(text, start, end + overlap))}
+
+# The keyword cache is process-wide and keyed on prompt text, so only prompts up to
+# this length are cached; at most 256 * 2 KB of user text stays resident. Longer
+# prompts are matched directly, without building a cache key
+_KEYWORD_CACHE_MAX_CHARS = 2048
+
+def _match_keywords(prompt_key: str, concept_table: ConceptTable) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """Returns the matched concepts per domain, in concept_table order.
+
+    prompt_key is the lowercased prompt, optionally with whitespace runs collapsed. Concept
+    tokens never contain whitespace, so that normalization can't change which tokens match.
+    """
+    scan = _build_keyword_matcher(concept_table)
+    masks = [0] * len(concept_table)
+    full = [(1 << len(concepts)) - 1 for _, concepts in concept_table]
+    start, window = 0, _SCAN_WINDOW
+    while start < len(prompt_key):
+        for targets in scan(prompt_key, start, start + window):
+            for d, bit in targets:
+                masks[d] |= bit
+        # Nothing left to find once every concept has matched
+        if masks == full:
+            break
+        if any(masks):
+            # Keyword-dense text: the automaton would mostly re-find known concepts,
+            # so look for the missing ones with plain substring searches instead
+            for d, (_, concepts) in enumerate(concept_table):
+                for j, (_, tokens) in enumerate(concepts):
+                    if not masks[d] >> j & 1 and any(token in prompt_key for token in tokens):
+                        masks[d] |= 1 << j
+            break
+        start, window = start + window, window * 2
+    return tuple(
+        (domain, tuple(concept for j, (concept, _) in enumerate(concepts) if mask >> j & 1) if mask else ())
+        for (domain, concepts), mask in zip(concept_table, masks)
+    )
+
+# Keyword routing depends only on the prompt and the concept table, so short prompts are memoized
+_extract_keywords_cached = lru_cache(maxsize=256)(_match_keywords)
 
 # ---------- Domain Model ----------
 
-@dataclass
-class FineTunedSLM:
-    domain: str
-    knowledge: Dict[str, str]
-    temperature: float = 0.6
-    system_prompt: str = field(init=False)
-
-    def __post_init__(self):
-        self.system_prompt = (
-            f"You are a specialized SLM for {self.domain}. "
-            f"Use concise, actionable language. Cite a Da Vinci study when relevant. "
-            f"Prefer design heuristics and constraints over vague generalities."
+_HYPHEN_TO_SPACE = str.maketrans("-", " ")
+
+@lru_cache(maxsize=None)
+def _system_prompt_for(domain: str) -> str:
+    # Built on first use and shared by every model instance of the same domain
+    return (
+        f"You are a specialized SLM for {domain}. "
+        f"Use concise, actionable language. Cite a Da Vinci study when relevant. "
+        f"Prefer design heuristics and constraints over vague generalities."
+    )
+
+@dataclass(frozen=True)
+class Insight:
+    text: str
+    concept: str
+
+class _ConceptIndex:
+    """Lookup tables derived from one knowledge table, shared by every model that uses it."""
+    __slots__ = (
+        "knowledge", "concept_tokens", "lower_to_key", "key_tuple",
+        "open_insights", "keyword_insights",
+    )
+
+    def __init__(self, knowledge: Mapping[str, str]):
+        self.knowledge = knowledge
+        # Normalize concept names once instead of on every prompt; kept in sorted
+        # order so keyword results come out sorted without a per-call sort
+        self.concept_tokens = tuple(
+            (k, tuple(k.lower().translate(_HYPHEN_TO_SPACE).split()))
+            for k in sorted(knowledge)
+        )
+        self.lower_to_key = MappingProxyType({k.lower(): k for k in knowledge})
+        self.key_tuple = tuple(knowledge.keys())
+        # Insights only vary by concept, so render them all up front; the
+        # open-ended ones are aligned with key_tuple for a direct rng.choice
+        self.open_insights = tuple(
+            Insight(
+                f"Consider **{k}**, informed by da Vinci's work on *{knowledge[k]}*. "
+                f"Translate this into constraints and a measurable performance target.",
+                k,
+            )
+            for k in self.key_tuple
         )
+        self.keyword_insights = MappingProxyType({
+            k: Insight(
+                f"Leverage **{k}** (cf. da Vinci's *{knowledge[k]}*). "
+                f"Define 2–3 constraints, an objective, and a quick benchtop test.",
+                k,
+            )
+            for k in self.key_tuple
+        })
+
+class FineTunedSLM:
+    __slots__ = (
+        "domain", "knowledge", "temperature", "rng",
+        "_concept_tokens", "_lower_to_key", "_key_tuple",
+        "_open_insights", "_keyword_insights",
+    )
+
+    def __init__(
+        self,
+        domain: str,
+        knowledge: Mapping[str, str],
+        temperature: float = 0.6,
+        rng: Optional[random.Random] = None,
+        index: Optional[_ConceptIndex] = None,
+    ):
+        self.domain = domain
+        self.knowledge = knowledge
+        self.temperature = temperature
+        self.rng = rng if rng is not None else random.Random(0)
+        # The built-in knowledge tables come with a shared index; the model only keeps references
+        if index is None:
+            index = _ConceptIndex(knowledge)
+        self._concept_tokens = index.concept_tokens
+        self._lower_to_key = index.lower_to_key
+        self._key_tuple = index.key_tuple
+        self._open_insights = index.open_insights
+        self._keyword_insights = index.keyword_insights
+
+    @property
+    def system_prompt(self) -> str:
+        return _system_prompt_for(self.domain)
 
-    def _choose(self, items: List[str]) -> str:
+    def _choose(self, items: Sequence[str]) -> str:
         if not items:
-            return random.choice(list(self.knowledge.keys()))
+            return self.rng.choice(self._key_tuple)
         if self.temperature >= 0.7 and len(items) > 1:
-            return random.choice(items)
+            return self.rng.choice(items)
         return items[0]
 
-    def generate_insight(self, prompt_keywords: List[str], user_prompt: str) -> str:
+    def generate_insight(self, prompt_keywords: List[str], user_prompt: str) -> Insight:
         if not prompt_keywords:
-            concept = self._choose([])
-            study = self.knowledge[concept]
-            return (
-                f"Consider **{concept}**, informed by da Vinci's work on *{study}*. "
-                f"Translate this into constraints and a measurable performance target."
-            )
+            return self.rng.choice(self._open_insights)
 
-        chosen_kw = self._choose(prompt_keywords)
-        concept = None
-        for k in self.knowledge.keys():
-            if chosen_kw.lower() == k.lower() or chosen_kw.lower() in k.lower():
-                concept = k
-                break
+        chosen_kw = self._choose(prompt_keywords).lower()
+        concept = self._lower_to_key.get(chosen_kw)
+        if not concept:
+            concept = next((k for low, k in self._lower_to_key.items() if chosen_kw in low), None)
         if not concept:
-            concept = self._choose(list(self.knowledge.keys()))
+            concept = self._choose(self._key_tuple)
 
-        study = self.knowledge[concept]
-        return (
-            f"Leverage **{concept}** (cf. da Vinci's *{study}*). "
-            f"Define 2–3 constraints, an objective, and a quick benchtop test."
-        )
+        return self._keyword_insights[concept]
+
+# ---------- Report Templates ----------
+
+def _fmt_ts(dt: datetime) -> str:
+    # Plain int formatting; avoids strftime's locale-aware libc path
+    return (
+        f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} "
+        f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+    )
+
+_REPORT_HEADER_TEMPLATE = (
+    "# 🎨 DVNC.ai — Innovation Report\n"
+    "*Conceptual Product Prototype*\n"
+    "\n"
+    "**Timestamp:** {timestamp}\n"
+    "**Challenge:** {prompt}\n"
+)
+
+_INSIGHTS_HEADING = "## 🔬 Multidisciplinary Insights\n\n"
+
+_SYNTHESIS_TEMPLATE = (
+    "## 🚀 Concept Synthesis\n"
+    "### **{concept_name}**\n"
+    "\n"
+    "**Primary Innovation Drivers:** `{drivers}`\n"
+)
+
+_ARCHITECTURE_SECTION = "\n".join([
+    "### 📐 System Architecture",
+    "",
+    "#### Structural Framework",
+    "- **Core Structure:** Lightweight skeletal frame with modular joints",
+    "- **Material Strategy:** High stiffness-to-weight ratio composites",
+    "- **Modularity:** Interchangeable components for rapid iteration",
+    "",
+    "#### Actuation System",
+    "- **Primary Motion:** Bio-inspired mechanism with optimized lever ratios",
+    "- **Control Logic:** Constraint-first controller (stability → efficiency → elegance)",
+    "- **Power Distribution:** Distributed energy management system",
+    "",
+])
+
+_VALIDATION_SECTION = "\n".join([
+    "### 🧪 Validation Framework",
+    "",
+    "#### Performance Metrics",
+    "| Domain | Key Performance Indicator | Target | Test Method |",
+    "|--------|--------------------------|--------|-------------|",
+    "| **Physics** | Lift/drag ratio | >3.5 | Wind tunnel testing |",
+    "| **Physics** | Structural deflection | <5mm @ rated load | Static load test |",
+    "| **Biomechanics** | Joint torque efficiency | >85% | Dynamometer analysis |",
+    "| **Biomechanics** | Fatigue resistance | >10,000 cycles | Cyclic loading |",
+    "| **Anatomy** | Ergonomic compliance | >90% user satisfaction | User studies |",
+    "| **Anatomy** | Proportional accuracy | ±2% of target | 3D scanning |",
+    "",
+])
+
+_ROADMAP_SECTION = "\n".join([
+    "### 🗺️ Implementation Roadmap",
+    "",
+    "#### Phase 1: Proof of Concept (Weeks 1-4)",
+    "- [ ] Convert constraints to parametric CAD model",
+    "- [ ] Develop initial control algorithms",
+    "- [ ] Create simulation environment",
+    "",
+    "#### Phase 2: Prototype Development (Weeks 5-8)",
+    "- [ ] Build physical breadboard prototype",
+    "- [ ] Implement sensor feedback systems",
+    "- [ ] Conduct initial performance tests",
+    "",
+    "#### Phase 3: Iteration & Optimization (Weeks 9-12)",
+    "- [ ] A/B testing with design variants",
+    "- [ ] Machine learning optimization of control parameters",
+    "- [ ] User testing and feedback integration",
+    "",
+    "---",
+    "*Powered by Leonardo da Vinci's timeless principles of observation and innovation*",
+])
+
+# ---------- Knowledge Base ----------
+
+PHYSICS_KNOWLEDGE: Mapping[str, str] = MappingProxyType({
+    "Fluid Dynamics": "water screws and canal studies",
+    "Aerodynamics": "ornithopter sketches and airflow notes",
+    "Lever Mechanics": "gear trains, pulleys, cranes",
+    "Structural Integrity": "bridges and fortification stress studies",
+    "Fractal Geometry": "tree branching and river delta patterns",
+    "Wave Propagation": "sound and light behavior studies",
+})
+
+BIOMECH_KNOWLEDGE: Mapping[str, str] = MappingProxyType({
+    "Joint Articulation": "elbow/shoulder motion notebooks",
+    "Muscular Force": "layered muscle drawings",
+    "Biological Levers": "limb lever ratios and gait notes",
+    "Skeletal Structure": "Vitruvian proportions and load paths",
+    "Kinematic Chains": "sequential movement studies",
+    "Energy Transfer": "force distribution in living systems",
+})
+
+ANATOMY_KNOWLEDGE: Mapping[str, str] = MappingProxyType({
+    "Human Proportionality": "Vitruvian Man proportional canon",
+    "Muscular Systems": "detailed musculature sheets",
+    "Circulatory System": "venous and arterial mapping",
+    "Body Mechanics": "posture, stance, and motion sequences",
+    "Neural Pathways": "brain and nerve studies",
+    "Sensory Integration": "eye and ear mechanism drawings",
+})
+
+_DOMAIN_ICONS = {
+    "Physics": "⚛️",
+    "Biomechanics": "🦾",
+    "Anatomy": "🫀",
+}
+
+# Lookup tables for each knowledge table, built once at import
+_PHYSICS_INDEX = _ConceptIndex(PHYSICS_KNOWLEDGE)
+_BIOMECH_INDEX = _ConceptIndex(BIOMECH_KNOWLEDGE)
+_ANATOMY_INDEX = _ConceptIndex(ANATOMY_KNOWLEDGE)
+
+@lru_cache(maxsize=16)
+def _domain_layout(include_domain: str) -> Tuple[Tuple[Tuple[str, _ConceptIndex], ...], Tuple[str, ...], ConceptTable]:
+    """Returns the (domain, index) slots, the sorted domain names and the concept table for a system."""
+    # The third slot always uses anatomy knowledge, under a custom name if given
+    domains = (
+        ("Physics", _PHYSICS_INDEX),
+        ("Biomechanics", _BIOMECH_INDEX),
+        (include_domain, _ANATOMY_INDEX),
+    )
+    concept_table = tuple((domain, index.concept_tokens) for domain, index in domains)
+    return domains, tuple(sorted(domain for domain, _ in domains)), concept_table
 
 # ---------- System Orchestration ----------
 
+@lru_cache(maxsize=4)
+def _seeded_state(seed: int) -> tuple:
+    return random.Random(seed).getstate()
+
+def _new_rng(seed: int) -> random.Random:
+    # Restoring a cached Mersenne Twister state is cheaper than seeding a fresh generator
+    rng = random.Random.__new__(random.Random)
+    rng.setstate(_seeded_state(seed))
+    return rng
+
 class DVNCSystem:
     def __init__(self, include_domain: str = "Anatomy", seed: int = 42):
-        random.seed(seed)
+        # Per-system RNG so concurrent sessions never share or reseed global state
+        self._rng = _new_rng(seed)
         
-        self.physics_knowledge = {
-            "Fluid Dynamics": "water screws and canal studies",
-            "Aerodynamics": "ornithopter sketches and airflow notes",
-            "Lever Mechanics": "gear trains, pulleys, cranes",
-            "Structural Integrity": "bridges and fortification stress studies",
-            "Fractal Geometry": "tree branching and river delta patterns",
-            "Wave Propagation": "sound and light behavior studies",
-        }
-        self.biomech_knowledge = {
-            "Joint Articulation": "elbow/shoulder motion notebooks",
-            "Muscular Force": "layered muscle drawings",
-            "Biological Levers": "limb lever ratios and gait notes",
-            "Skeletal Structure": "Vitruvian proportions and load paths",
-            "Kinematic Chains": "sequential movement studies",
-            "Energy Transfer": "force distribution in living systems",
-        }
-        self.anatomy_knowledge = {
-            "Human Proportionality": "Vitruvian Man proportional canon",
-            "Muscular Systems": "detailed musculature sheets",
-            "Circulatory System": "venous and arterial mapping",
-            "Body Mechanics": "posture, stance, and motion sequences",
-            "Neural Pathways": "brain and nerve studies",
-            "Sensory Integration": "eye and ear mechanism drawings",
-        }
+        # Knowledge tables are module-level and read-only, so sessions share them
+        self.physics_knowledge = PHYSICS_KNOWLEDGE
+        self.biomech_knowledge = BIOMECH_KNOWLEDGE
+        self.anatomy_knowledge = ANATOMY_KNOWLEDGE
 
+        include_domain = include_domain.strip()
+        if not include_domain or include_domain.lower() == "anatomy":
+            include_domain = "Anatomy"
+        # The concept table fingerprints every concept token; systems with the same table share one matcher
+        domains, self._sorted_domains, self._concept_table = _domain_layout(include_domain)
         self.models = {
-            "Physics": FineTunedSLM("Physics", self.physics_knowledge),
-            "Biomechanics": FineTunedSLM("Biomechanics", self.biomech_knowledge),
+            d: FineTunedSLM(d, index.knowledge, rng=self._rng, index=index) for d, index in domains
         }
 
-        include_domain = include_domain.strip()
-        if include_domain.lower() == "anatomy":
-            self.models["Anatomy"] = FineTunedSLM("Anatomy", self.anatomy_knowledge)
-        else:
-            self.models[include_domain] = FineTunedSLM(include_domain, self.anatomy_knowledge)
+    def reseed(self, seed: int):
+        # Models hold a reference to the shared RNG, so reseed it in place
+        self._rng.seed(seed)
 
     def extract_keywords(self, prompt: str) -> Dict[str, List[str]]:
-        prompt_low = prompt.lower()
-        result = {}
-        for domain, model in self.models.items():
-            kws = []
-            for concept in model.knowledge.keys():
-                parts = [p.strip() for p in concept.lower().replace("-", " ").split() if p.strip()]
-                if any(p in prompt_low for p in parts):
-                    kws.append(concept)
-            result[domain] = sorted(set(kws))
-        return result
-
-    def generate_insights(self, prompt: str, keywords: Dict[str, List[str]]) -> Dict[str, str]:
+        if not prompt or prompt.isspace():
+            return {domain: [] for domain in self.models}
+        if len(prompt) > _KEYWORD_CACHE_MAX_CHARS:
+            # Not cached, so the whitespace-collapsed key isn't needed either
+            matched = _match_keywords(prompt.lower(), self._concept_table)
+        else:
+            prompt_key = " ".join(prompt.lower().split())
+            matched = _extract_keywords_cached(prompt_key, self._concept_table)
+        return {domain: list(concepts) for domain, concepts in matched}
+
+    def generate_insights(self, prompt: str, keywords: Dict[str, List[str]]) -> Dict[str, Insight]:
         insights = {}
         for domain, model in self.models.items():
             insights[domain] = model.generate_insight(keywords.get(domain, []), user_prompt=prompt)
         return insights
 
-    def synthesize_design(self, prompt: str, insights: Dict[str, str]) -> List[str]:
-        """Returns design synthesis as a list of sections for streaming"""
-        drivers = self._choose_drivers(insights)
-        concept_name = self._propose_concept_name(drivers)
-        
-        sections = []
-        
+    def iter_design_sections(self, prompt: str, insights: Dict[str, Insight]) -> Iterator[str]:
+        """Yields design synthesis sections one at a time so each can be streamed as soon as it's built"""
         # Header section
-        header = [
-            "# 🎨 DVNC.ai — Innovation Report",
-            f"*Conceptual Product Prototype*",
-            "",
-            f"**Timestamp:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-            f"**Challenge:** {prompt}",
-            ""
-        ]
-        sections.append("\n".join(header))
+        yield _REPORT_HEADER_TEMPLATE.format(
+            timestamp=_fmt_ts(datetime.now()),
+            prompt=prompt,
+        )
         
         # Insights section
-        insights_lines = ["## 🔬 Multidisciplinary Insights\n"]
-        for domain in sorted(insights.keys()):
-            domain_icon = self._get_domain_icon(domain)
-            insights_lines.append(f"### {domain_icon} {domain}")
-            insights_lines.append(f"{insights[domain]}\n")
-        sections.append("\n".join(insights_lines))
+        yield _INSIGHTS_HEADING + "\n".join(
+            f"### {self._get_domain_icon(domain)} {domain}\n{insights[domain].text}\n"
+            for domain in self._sorted_domains
+        )
         
         # Synthesis section
-        synthesis = [
-            "## 🚀 Concept Synthesis",
-            f"### **{concept_name}**",
-            "",
-            f"**Primary Innovation Drivers:** `{' × '.join(drivers)}`",
-            ""
-        ]
-        sections.append("\n".join(synthesis))
-        
-        # Architecture section
-        architecture = [
-            "### 📐 System Architecture",
-            "",
-            "#### Structural Framework",
-            "- **Core Structure:** Lightweight skeletal frame with modular joints",
-            "- **Material Strategy:** High stiffness-to-weight ratio composites",
-            "- **Modularity:** Interchangeable components for rapid iteration",
-            "",
-            "#### Actuation System",
-            "- **Primary Motion:** Bio-inspired mechanism with optimized lever ratios",
-            "- **Control Logic:** Constraint-first controller (stability → efficiency → elegance)",
-            "- **Power Distribution:** Distributed energy management system",
-            ""
-        ]
-        sections.append("\n".join(architecture))
-        
-        # Validation section
-        validation = [
-            "### 🧪 Validation Framework",
-            "",
-            "#### Performance Metrics",
-            "| Domain | Key Performance Indicator | Target | Test Method |",
-            "|--------|--------------------------|--------|-------------|",
-            "| **Physics** | Lift/drag ratio | >3.5 | Wind tunnel testing |",
-            "| **Physics** | Structural deflection | <5mm @ rated load | Static load test |",
-            "| **Biomechanics** | Joint torque efficiency | >85% | Dynamometer analysis |",
-            "| **Biomechanics** | Fatigue resistance | >10,000 cycles | Cyclic loading |",
-            "| **Anatomy** | Ergonomic compliance | >90% user satisfaction | User studies |",
-            "| **Anatomy** | Proportional accuracy | ±2% of target | 3D scanning |",
-            ""
-        ]
-        sections.append("\n".join(validation))
-        
-        # Implementation roadmap
-        roadmap = [
-            "### 🗺️ Implementation Roadmap",
-            "",
-            "#### Phase 1: Proof of Concept (Weeks 1-4)",
-            "- [ ] Convert constraints to parametric CAD model",
-            "- [ ] Develop initial control algorithms",
-            "- [ ] Create simulation environment",
-            "",
-            "#### Phase 2: Prototype Development (Weeks 5-8)",
-            "- [ ] Build physical breadboard prototype",
-            "- [ ] Implement sensor feedback systems",
-            "- [ ] Conduct initial performance tests",
-            "",
-            "#### Phase 3: Iteration & Optimization (Weeks 9-12)",
-            "- [ ] A/B testing with design variants",
-            "- [ ] Machine learning optimization of control parameters",
-            "- [ ] User testing and feedback integration",
-            "",
-            "---",
-            "*Powered by Leonardo da Vinci's timeless principles of observation and innovation*"
-        ]
-        sections.append("\n".join(roadmap))
+        drivers = self._choose_drivers(insights)
+        yield _SYNTHESIS_TEMPLATE.format(
+            concept_name=self._propose_concept_name(drivers),
+            drivers=" × ".join(drivers),
+        )
         
-        return sections
+        # Static sections are pre-joined at import time
+        yield _ARCHITECTURE_SECTION
+        yield _VALIDATION_SECTION
+        yield _ROADMAP_SECTION
 
     def _get_domain_icon(self, domain: str) -> str:
-        icons = {
-            "Physics": "⚛️",
-            "Biomechanics": "🦾",
-            "Anatomy": "🫀"
-        }
-        return icons.get(domain, "🔬")
-
-    def _choose_drivers(self, insights: Dict[str, str]) -> List[str]:
-        import re
-        drivers = []
-        for txt in insights.values():
-            bolds = re.findall(r"\*\*(.+?)\*\*", txt)
-            if bolds:
-                drivers.append(bolds[0])
-        if not drivers:
-            drivers = list(insights.keys())
-        return drivers[:3]
+        return _DOMAIN_ICONS.get(domain, "🔬")
+
+    def _choose_drivers(self, insights: Dict[str, Insight]) -> List[str]:
+        # Each insight already carries the concept it highlights
+        return [insight.concept for insight in list(insights.values())[:3]]
 
     def _propose_concept_name(self, drivers: List[str]) -> str:
         nouns = [d.split()[-1] for d in drivers]
@@ -243,24 +436,55 @@ class DVNCSystem:
 
 class ChatHistory:
     def __init__(self):
-        self.history = []
         self.max_history = 50
+        # Bounded ring: appends past max_history drop the oldest entry in O(1)
+        self.history = deque(maxlen=self.max_history)
         
     def add_interaction(self, user_input: str, assistant_response: str):
+        # Only the prompt is ever displayed, so the full report isn't kept per entry
         self.history.append({
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": time.time(),  # formatted only when displayed
             "user": user_input,
-            "assistant": assistant_response
         })
-        # Keep only last N interactions
-        if len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history:]
     
     def get_recent(self, n: int = 5) -> List[Dict]:
-        return self.history[-n:] if self.history else []
+        return list(self.history)[-n:] if self.history else []
     
     def clear(self):
-        self.history = []
+        self.history.clear()
+
+# ---------- Streaming Helpers ----------
+
+# Push buffered message content every 80ms or 512 new characters, whichever comes first
+_FLUSH_INTERVAL = 0.08
+_FLUSH_CHARS = 512
+
+def _new_flush_state() -> Dict:
+    # Pending fragments are kept in a list and joined once per flush, so the
+    # growing message content is not re-copied for every small append
+    return {"last_flush": time.monotonic(), "pending": [], "pending_len": 0}
+
+async def _flush_now(msg: cl.Message, state: Dict, now: Optional[float] = None):
+    if state["pending"]:
+        # stream_token sends only the delta and appends it to msg.content itself
+        await msg.stream_token("".join(state["pending"]))
+        state["pending"].clear()
+        state["pending_len"] = 0
+    state["last_flush"] = time.monotonic() if now is None else now
+
+async def _flush_if_due(msg: cl.Message, state: Dict, now: Optional[float] = None):
+    """Send the message only when enough time has passed or enough text is pending."""
+    now = time.monotonic() if now is None else now
+    if now - state["last_flush"] >= _FLUSH_INTERVAL or state["pending_len"] >= _FLUSH_CHARS:
+        await _flush_now(msg, state, now)
+
+async def _stream_write(msg: cl.Message, state: Dict, text: str, flush: bool = False):
+    state["pending"].append(text)
+    state["pending_len"] += len(text)
+    if flush:
+        await _flush_now(msg, state)
+    else:
+        await _flush_if_due(msg, state)
 
 # ---------- Chainlit Application ----------
 
@@ -268,6 +492,31 @@ class ChatHistory:
 dvnc_system: Optional[DVNCSystem] = None
 chat_history: Optional[ChatHistory] = None
 
+# Prebuilt message content, shared by every session
+_WELCOME = "\n".join((
+    "# 🎨 DVNC.ai",
+    "## *Leonardo's Intelligence, Reimagined for the 21st Century*",
+    "",
+    "Welcome to a revolutionary AI system that channels Leonardo da Vinci's genius "
+    "to solve modern engineering challenges.",
+    "",
+    "### 🧠 My Capabilities:",
+    "- **Multi-Domain Analysis**: Physics, Biomechanics, and Anatomy",
+    "- **Cross-Disciplinary Innovation**: Connecting insights across domains",
+    "- **Da Vinci Methodology**: Systematic observation and radical creativity",
+    "",
+    "### 💡 Example Challenges:",
+    "```",
+    "• Design a bio-inspired underwater drone",
+    "• Create an adaptive prosthetic limb",
+    "• Develop a shape-shifting rescue robot",
+    "• Engineer a self-healing material system",
+    "```",
+    "",
+    "---",
+    "*What engineering challenge shall we explore together?*",
+)) + "\n"
+
 @cl.on_chat_start
 async def start():
     """Initialize the DVNC.ai system when a user connects."""
@@ -279,40 +528,10 @@ async def start():
         url="https://raw.githubusercontent.com/microsoft/fluentui-emoji/main/assets/Artist%20palette/Color/artist_palette_color.svg"
     ).send()
     
-    # Send animated welcome message
-    welcome_parts = [
-        "# 🎨 DVNC.ai",
-        "## *Leonardo's Intelligence, Reimagined for the 21st Century*",
-        "",
-        "Welcome to a revolutionary AI system that channels Leonardo da Vinci's genius "
-        "to solve modern engineering challenges.",
-        "",
-        "### 🧠 My Capabilities:",
-        "- **Multi-Domain Analysis**: Physics, Biomechanics, and Anatomy",
-        "- **Cross-Disciplinary Innovation**: Connecting insights across domains",
-        "- **Da Vinci Methodology**: Systematic observation and radical creativity",
-        "",
-        "### 💡 Example Challenges:",
-        "```",
-        "• Design a bio-inspired underwater drone",
-        "• Create an adaptive prosthetic limb",
-        "• Develop a shape-shifting rescue robot",
-        "• Engineer a self-healing material system",
-        "```",
-        "",
-        "---",
-        "*What engineering challenge shall we explore together?*"
-    ]
-    
-    # Stream the welcome message
-    msg = cl.Message(content="")
+    # Send the welcome message in one frame
+    msg = cl.Message(content=_WELCOME)
     await msg.send()
     
-    for part in welcome_parts:
-        await asyncio.sleep(0.05)  # Small delay for streaming effect
-        msg.content += part + "\n"
-        await msg.update()
-    
     # Initialize the DVNC system
     dvnc_system = DVNCSystem(include_domain="Anatomy", seed=42)
     chat_history = ChatHistory()
@@ -342,100 +561,62 @@ async def main(message: cl.Message):
         await cl.Message(content="⚠️ System not initialized. Please refresh the page.").send()
         return
     
-    # Get user prompt
-    user_prompt = message.content
-    
-    # Initialize response message for streaming
-    response_msg = cl.Message(content="")
-    await response_msg.send()
-    
-    # Stage 1: Processing indicator with animation
-    processing_frames = [
-        "🔬 Analyzing your challenge",
-        "🔬 Analyzing your challenge.",
-        "🔬 Analyzing your challenge..",
-        "🔬 Analyzing your challenge..."
-    ]
-    
-    for frame in processing_frames:
-        response_msg.content = frame
-        await response_msg.update()
-        await asyncio.sleep(0.2)
-    
-    # Stage 2: Extract keywords with streaming
-    response_msg.content = "### 📍 Domain Analysis\n\n"
-    await response_msg.update()
-    
-    keywords = dvnc_system.extract_keywords(user_prompt)
-    
-    # Stream keyword analysis
+    await _run_analysis(dvnc_system, chat_history, message.content)
+
+async def _run_analysis(
+    dvnc_system: DVNCSystem,
+    chat_history: ChatHistory,
+    user_prompt: str,
+    keywords: Optional[Dict[str, List[str]]] = None,
+):
+    """Stream the full analysis for a prompt, reusing already-extracted keywords if given."""
+    
+    # Stage 1: Extract keywords behind a native Chainlit loader. Both CPU stages take a
+    # few microseconds, far less than a thread-pool hop, so they run on the event loop
+    if keywords is None:
+        async with cl.Step(name="Analyzing your challenge") as step:
+            keywords = dvnc_system.extract_keywords(user_prompt)
+            matched = sum(map(len, keywords.values()))
+            if not matched:
+                step.output = "No concepts matched"
+            else:
+                step.output = f"{matched} concept{'s' if matched > 1 else ''} matched"
+        # Keyword routing is deterministic, so regenerate can reuse it
+        cl.user_session.set("last_prompt", user_prompt)
+        cl.user_session.set("last_keywords", keywords)
+    
+    # Stage 2: Send the whole domain analysis in one frame
+    keyword_lines = ["### 📍 Domain Analysis\n"]
     for domain, kws in keywords.items():
         icon = dvnc_system._get_domain_icon(domain)
-        domain_text = f"**{icon} {domain}:** "
-        if kws:
-            domain_text += f"`{' • '.join(kws)}`\n"
-        else:
-            domain_text += "*No specific concepts detected*\n"
-        
-        response_msg.content += domain_text
-        await response_msg.update()
-        await asyncio.sleep(0.1)
+        detected = f"`{' • '.join(kws)}`" if kws else "*No specific concepts detected*"
+        keyword_lines.append(f"**{icon} {domain}:** {detected}")
+    keyword_lines.append("\n---\n### 💡 Generating Domain Insights\n\n")
     
-    response_msg.content += "\n---\n"
-    await response_msg.update()
+    response_msg = cl.Message(content="\n".join(keyword_lines))
+    await response_msg.send()
+    stream_state = _new_flush_state()
     
     # Stage 3: Generate insights with streaming
-    response_msg.content += "### 💡 Generating Domain Insights\n\n"
-    await response_msg.update()
-    
     insights = dvnc_system.generate_insights(user_prompt, keywords)
     
     # Stream each insight
-    for domain, insight in sorted(insights.items()):
+    for domain in dvnc_system._sorted_domains:
+        insight = insights[domain]
         icon = dvnc_system._get_domain_icon(domain)
         
         # Stream domain header
-        response_msg.content += f"**{icon} {domain} Analysis:**\n"
-        await response_msg.update()
-        await asyncio.sleep(0.1)
-        
-        # Stream insight text word by word for effect
-        words = insight.split()
-        line = ""
-        for i, word in enumerate(words):
-            line += word + " "
-            if i % 5 == 4:  # Update every 5 words
-                response_msg.content += line
-                await response_msg.update()
-                line = ""
-                await asyncio.sleep(0.05)
-        
-        if line:  # Add remaining words
-            response_msg.content += line
-            await response_msg.update()
+        await _stream_write(response_msg, stream_state, f"**{icon} {domain} Analysis:**\n")
         
-        response_msg.content += "\n\n"
-        await response_msg.update()
-    
-    response_msg.content += "---\n"
-    await response_msg.update()
+        # Writes are batched anyway, so each insight goes into the buffer whole
+        await _stream_write(response_msg, stream_state, insight.text + " \n\n")
     
     # Stage 4: Synthesize design with section streaming
-    response_msg.content += "\n"
-    await response_msg.update()
+    await _stream_write(response_msg, stream_state, "---\n\n", flush=True)
     
-    design_sections = dvnc_system.synthesize_design(user_prompt, insights)
-    
-    # Stream each section
-    for section in design_sections:
-        # Add section with streaming effect
-        lines = section.split('\n')
-        for line in lines:
-            response_msg.content += line + "\n"
-            await response_msg.update()
-            await asyncio.sleep(0.02)  # Very short delay for smooth streaming
-        
-        await asyncio.sleep(0.1)  # Pause between sections
+    # Sections are complete markdown blocks, so each goes out as one frame
+    for section in dvnc_system.iter_design_sections(user_prompt, insights):
+        await _stream_write(response_msg, stream_state, section + "\n", flush=True)
     
     # Save to history
     full_response = response_msg.content
@@ -462,14 +643,16 @@ async def on_regenerate(action: cl.Action):
     """Handle regeneration requests."""
     # Re-seed the system for different results
     dvnc_system = cl.user_session.get("dvnc_system")
-    dvnc_system.__init__(include_domain="Anatomy", seed=random.randint(1, 1000))
+    dvnc_system.reseed(random.randint(1, 1000))
     
-    # Create a new message with the original prompt
-    await cl.Message(content=f"🔄 Regenerating analysis for: *{action.value}*").send()
+    # Only insights and synthesis change between runs; reuse the last routing
+    user_prompt = action.value
+    keywords = None
+    if cl.user_session.get("last_prompt") == user_prompt:
+        keywords = cl.user_session.get("last_keywords")
     
-    # Trigger the main handler with the original prompt
-    mock_message = cl.Message(content=action.value)
-    await main(mock_message)
+    await cl.Message(content=f"🔄 Regenerating analysis for: *{user_prompt}*").send()
+    await _run_analysis(dvnc_system, cl.user_session.get("chat_history"), user_prompt, keywords)
 
 @cl.action_callback("clear_history")
 async def on_clear_history(action: cl.Action):
@@ -490,7 +673,8 @@ async def on_show_history(action: cl.Action):
     
     history_msg = "### 📜 Recent Conversations\n\n"
     for i, item in enumerate(recent, 1):
-        timestamp = datetime.fromisoformat(item["timestamp"]).strftime("%H:%M:%S")
+        dt = datetime.fromtimestamp(item["timestamp"])
+        timestamp = f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
         history_msg += f"**[{timestamp}] Query {i}:**\n"
         history_msg += f"_{item['user'][:100]}..._\n\n"
     
@@ -519,7 +703,7 @@ async def on_save_report(action: cl.Action):
 @cl.on_settings_update
 async def setup_agent(settings):
     """Handle settings updates if needed."""
-    pass
+    _extract_keywords_cached.cache_clear()
 
 if __name__ == "__main__":
     # This would be run with: chainlit run dvnc_chainlit.py -w